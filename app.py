@@ -1,15 +1,23 @@
 from flask import Flask, render_template, jsonify, request
+from werkzeug.http import http_date
 import geopandas as gpd
 import pandas as pd
 import numpy as np
 from shapely.geometry import box
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from shapely.ops import unary_union
 import json
 from tqdm import tqdm
 import os
 from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import gzip
+
+# Brotli is optional; gzip is used when it is not installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Custom JSON encoder to handle NaN values
 class CustomJSONEncoder(json.JSONEncoder):
@@ -23,9 +31,107 @@ class CustomJSONEncoder(json.JSONEncoder):
 app = Flask(__name__)
 app.json_encoder = CustomJSONEncoder
 
+# Answer FFW time-overlap queries from the interval index built at load time.
+# Set to False to scan the ISSUED/EXPIRED columns instead, the reference path
+# benchmarks/golden.py checks the index against.
+app.config.setdefault('FFW_OVERLAP_INDEX', True)
+# Compute verification windows for whole arrays of dates with get_date_ranges.
+# Set to False to call get_date_range row by row, the reference path for the
+# vectorized windows.
+app.config.setdefault('VECTORIZED_WINDOWS', True)
+
 # Cache for loaded data
 DATA_CACHE = {}
 
+# Compact map payload format, negotiated via the Accept header
+COMPACT_MIMETYPE = 'application/vnd.fho.compact+json'
+COORD_SCALE = 100000  # Quantize coordinates to 1e-5 degrees (~1 m)
+
+# Optional boundary file for regional IBW statistics. Every non-geometry
+# column is a region type (e.g. STATE, RFC) naming the region of each polygon.
+REGIONS_FILE = 'regions.gpkg'
+
+# Only compress JSON responses larger than this many bytes
+COMPRESS_MIN_SIZE = 1024
+
+# Verification window offsets in days from the FHO issuance date
+FORECAST_PERIOD_DAYS = {
+    '1-3': (0, 3),  # Start from issuance day
+    '4-7': (3, 7),  # Start from day 4
+    '1-7': (0, 7)   # Start from issuance day
+}
+
+# Verification window start/end hour (UTC) for each issuance
+ISSUANCE_HOURS_UTC = {
+    'am': 12,  # AM issuance at 12:00 UTC (7 AM CDT / 6 AM CST)
+    'pm': 21   # PM issuance at 21:00 UTC (4 PM CDT / 3 PM CST)
+}
+
+class IntervalOverlapIndex:
+    """Sorted-endpoint index answering time-overlap queries over [start, end] intervals.
+    
+    Intervals up to a length cap (the long_quantile duration) are sorted by
+    start time. Any of them overlapping a query window [lo, hi] starts within
+    [lo - cap, hi], so a query only scans that slice. Longer intervals, such as
+    a warning with a bad EXPIRED time, go to a small side list that is scanned
+    linearly, so a single outlier cannot widen every later query. For flood
+    warnings a query costs O(log n + k). Queries return positional indices in
+    ascending order, so iloc keeps the original row order.
+    """
+
+    def __init__(self, starts, ends, long_quantile=0.99):
+        starts = np.asarray(starts, dtype='datetime64[ns]')
+        ends = np.asarray(ends, dtype='datetime64[ns]')
+
+        # Intervals with a missing endpoint never overlap anything
+        valid = np.flatnonzero(~(np.isnat(starts) | np.isnat(ends)))
+        durations = (ends[valid] - starts[valid]).astype(np.int64)
+        cap = max(int(np.quantile(durations, long_quantile)), 0) if len(durations) else 0
+        self.cap = np.timedelta64(cap, 'ns')
+
+        long = durations > cap
+        self.positions, self.starts, self.ends = self._sorted_by_start(valid[~long], starts, ends)
+        self.long_positions, self.long_starts, self.long_ends = self._sorted_by_start(valid[long], starts, ends)
+
+    @staticmethod
+    def _sorted_by_start(positions, starts, ends):
+        """Get positions, starts and ends of a set of intervals, sorted by start time."""
+        positions = positions[np.argsort(starts[positions], kind='stable')]
+        return positions, starts[positions], ends[positions]
+
+    def _bounds(self, window_starts, window_ends):
+        """Get the candidate slices [lo, hi) of short intervals and [0, long_hi) of long ones for each window."""
+        lo = np.searchsorted(self.starts, window_starts - self.cap, side='left')
+        hi = np.searchsorted(self.starts, window_ends, side='right')
+        long_hi = np.searchsorted(self.long_starts, window_ends, side='right')
+        return lo, hi, long_hi
+
+    def _overlapping(self, lo, hi, long_hi, window_start):
+        """Get the positions in the candidate slices whose interval ends at or after window_start."""
+        short = self.positions[lo:hi][self.ends[lo:hi] >= window_start] if lo < hi else self.positions[:0]
+        if long_hi == 0:
+            return np.sort(short)
+        long = self.long_positions[:long_hi][self.long_ends[:long_hi] >= window_start]
+        return np.sort(np.concatenate([short, long]))
+
+    def query(self, window_start, window_end):
+        """Get positions of intervals with start <= window_end and end >= window_start."""
+        window_start = np.datetime64(window_start, 'ns')
+        window_end = np.datetime64(window_end, 'ns')
+        if np.isnat(window_start) or np.isnat(window_end):
+            return np.empty(0, dtype=np.intp)
+        return self._overlapping(*self._bounds(window_start, window_end), window_start)
+
+    def query_many(self, window_starts, window_ends):
+        """Batch version of query; returns one array of positions per window."""
+        window_starts = np.asarray(window_starts, dtype='datetime64[ns]')
+        window_ends = np.asarray(window_ends, dtype='datetime64[ns]')
+        lo, hi, long_hi = self._bounds(window_starts, window_ends)
+        missing = np.isnat(window_starts) | np.isnat(window_ends)
+        hi[missing] = lo[missing]
+        long_hi[missing] = 0
+        return [self._overlapping(l, h, lh, start) for l, h, lh, start in zip(lo, hi, long_hi, window_starts)]
+
 def load_layer(args):
     """Helper function to load a single layer."""
     year, period = args
@@ -48,6 +154,38 @@ def load_warning_layer(year):
         print(f"Could not read flood warnings for {year}: {e}")
         return None
 
+def build_region_lookup(ffws):
+    """Assign every FFW to a region for each region type.
+    
+    Regions come from the FFW office (WFO) attribute and, when REGIONS_FILE
+    exists, from a spatial join of each warning's representative point
+    against its boundaries. Returns {region_type: (codes, names)}, where codes
+    is aligned with the ffws rows and indexes into names.
+    """
+    lookup = {}
+    if 'WFO' in ffws.columns:
+        lookup['wfo'] = pd.factorize(ffws['WFO'].fillna('Unknown').astype(str), sort=True)
+
+    if os.path.exists(REGIONS_FILE):
+        try:
+            regions = gpd.read_file(REGIONS_FILE)
+            points = gpd.GeoDataFrame(geometry=ffws.geometry.representative_point().to_numpy(),
+                                      crs=ffws.crs).to_crs(regions.crs)
+            # intersects keeps points on a shared boundary; take the first region they touch
+            joined = gpd.sjoin(points, regions, how='left', predicate='intersects')
+            joined = joined[~joined.index.duplicated(keep='first')].sort_index()
+            for column in regions.columns.drop(regions.geometry.name):
+                region_type = column.lower()
+                if region_type in lookup:
+                    print(f"Skipping region column {column} in {REGIONS_FILE}: region type '{region_type}' already exists")
+                    continue
+                lookup[region_type] = pd.factorize(joined[column].fillna('Unknown').astype(str), sort=True)
+            print(f"Loaded {len(regions)} regions from {REGIONS_FILE}")
+        except Exception as e:
+            print(f"Could not read regions from {REGIONS_FILE}: {e}")
+
+    return {region_type: (np.asarray(codes), np.asarray(names)) for region_type, (codes, names) in lookup.items()}
+
 # Load data with caching
 def load_data():
     if 'fho_areas' in DATA_CACHE and 'lsrs' in DATA_CACHE and 'ffws' in DATA_CACHE:
@@ -59,14 +197,14 @@ def load_data():
     
     # Parallel loading of FHO layers
     with ThreadPoolExecutor(max_workers=4) as executor:
-        fho_layers = []
         futures = [executor.submit(load_layer, (year, period)) 
                   for year in years for period in periods]
         
         for future in tqdm(as_completed(futures), total=len(futures), desc="Loading FHO layers"):
-            layer = future.result()
-            if layer is not None:
-                fho_layers.append(layer)
+            future.result()
+
+    # Combine in submission order so row order does not depend on load timing
+    fho_layers = [future.result() for future in futures if future.result() is not None]
 
     print("Combining FHO data...")
     fho_areas = pd.concat(fho_layers, ignore_index=True) if fho_layers else None
@@ -85,13 +223,12 @@ def load_data():
 
     print("Loading flood warnings...")
     with ThreadPoolExecutor(max_workers=4) as executor:
-        ffws = []
         futures = [executor.submit(load_warning_layer, year) for year in years]
         
         for future in tqdm(as_completed(futures), total=len(futures), desc="Loading flood warnings"):
-            layer = future.result()
-            if layer is not None:
-                ffws.append(layer)
+            future.result()
+
+    ffws = [future.result() for future in futures if future.result() is not None]
 
     print("Combining flood warnings...")
     ffws = pd.concat(ffws) if ffws else None
@@ -109,16 +246,28 @@ def load_data():
     # Filter for flood warnings
     ffws = ffws[ffws["PHENOM"] == "FF"]
 
+    # Index warning lifetimes for verification window overlap queries
+    print("Indexing flood warning times...")
+    ffw_index = IntervalOverlapIndex(ffws["ISSUED"], ffws["EXPIRED"])
+
+    # Assign warnings to regions for the regional IBW breakdown
+    print("Assigning flood warnings to regions...")
+    ffw_regions = build_region_lookup(ffws)
+
     # Cache the results
     DATA_CACHE['fho_areas'] = fho_areas
     DATA_CACHE['lsrs'] = lsrs
     DATA_CACHE['ffws'] = ffws
+    DATA_CACHE['ffw_index'] = ffw_index
+    DATA_CACHE['ffw_regions'] = ffw_regions
 
     print("Data loading complete!")
     return fho_areas, lsrs, ffws
 
 # Load data at startup
 fho_areas, lsrs, ffws = load_data()
+ffw_index = DATA_CACHE.get('ffw_index')
+ffw_regions = DATA_CACHE.get('ffw_regions', {})
 
 def get_date_range(issuance_time, forecast_period, fho_issuance_date):
     """Get the date range for a given forecast period based on FHO issuance date.
@@ -127,33 +276,100 @@ def get_date_range(issuance_time, forecast_period, fho_issuance_date):
     - AM issuance: 12:00 UTC (7 AM CDT / 6 AM CST)
     - PM issuance: 21:00 UTC (4 PM CDT / 3 PM CST)
     """
-    if forecast_period == "1-3":
-        start_days = 0  # Start from issuance day
-        end_days = 3
-    elif forecast_period == "4-7":
-        start_days = 3  # Start from day 4
-        end_days = 7
-    elif forecast_period == "1-7":
-        start_days = 0  # Start from issuance day
-        end_days = 7
-    else:
+    if forecast_period not in FORECAST_PERIOD_DAYS:
         return None, None
+    start_days, end_days = FORECAST_PERIOD_DAYS[forecast_period]
     
     # Use UTC times to match FHO data
-    if issuance_time.lower() == "am":
-        # AM issuance at 12:00 UTC (7 AM CDT / 6 AM CST)
-        start_time = datetime.strptime("12:00:00", "%H:%M:%S").time()
-        end_time = datetime.strptime("12:00:00", "%H:%M:%S").time()
-    else:  # PM issuance
-        # PM issuance at 21:00 UTC (4 PM CDT / 3 PM CST)
-        start_time = datetime.strptime("21:00:00", "%H:%M:%S").time()
-        end_time = datetime.strptime("21:00:00", "%H:%M:%S").time()
+    issuance_hour = ISSUANCE_HOURS_UTC['am' if issuance_time.lower() == "am" else 'pm']
+    issued = datetime.combine(fho_issuance_date, time(issuance_hour))
     
     # Calculate start and end dates with exact times in UTC
-    start_date = datetime.combine(fho_issuance_date + timedelta(days=start_days), start_time)
-    end_date = datetime.combine(fho_issuance_date + timedelta(days=end_days), end_time)
+    return issued + timedelta(days=start_days), issued + timedelta(days=end_days)
+
+def get_date_ranges(issuance_times, forecast_periods, fho_issuance_dates):
+    """Vectorized get_date_range over arrays of issuance times, forecast periods and dates.
+    
+    Scalar issuance times or forecast periods are broadcast against the dates.
+    Returns datetime64[ns] arrays of window starts and ends, with NaT where
+    the forecast period is not recognized.
+    """
+    dates = np.asarray(fho_issuance_dates, dtype='datetime64[D]')
+    issuance_times = np.broadcast_to(np.asarray(issuance_times, dtype=str), dates.shape)
+    forecast_periods = np.broadcast_to(np.asarray(forecast_periods, dtype=object), dates.shape)
+    
+    start_days = np.zeros(dates.shape, dtype='timedelta64[D]')
+    end_days = np.zeros(dates.shape, dtype='timedelta64[D]')
+    valid = np.zeros(dates.shape, dtype=bool)
+    for period, (period_start, period_end) in FORECAST_PERIOD_DAYS.items():
+        period_mask = forecast_periods == period
+        start_days[period_mask] = period_start
+        end_days[period_mask] = period_end
+        valid |= period_mask
     
-    return start_date, end_date
+    issuance_hours = np.where(np.char.lower(issuance_times) == 'am',
+                              ISSUANCE_HOURS_UTC['am'], ISSUANCE_HOURS_UTC['pm'])
+    issued = dates + issuance_hours.astype('timedelta64[h]')
+    
+    starts = np.where(valid, issued + start_days, np.datetime64('NaT')).astype('datetime64[ns]')
+    ends = np.where(valid, issued + end_days, np.datetime64('NaT')).astype('datetime64[ns]')
+    return starts, ends
+
+def get_verification_windows(issuance_time, forecast_period, fho_issuance_dates):
+    """Get verification window start/end arrays for an array of FHO issuance dates.
+    
+    Uses get_date_ranges, or get_date_range per date when VECTORIZED_WINDOWS
+    is off. Both return datetime64[ns] arrays with NaT for invalid windows.
+    """
+    if app.config['VECTORIZED_WINDOWS']:
+        return get_date_ranges(issuance_time, forecast_period, fho_issuance_dates)
+    windows = [get_date_range(issuance_time, forecast_period, date) if date is not None else (None, None)
+               for date in np.asarray(fho_issuance_dates, dtype='datetime64[D]').astype(object)]
+    starts = np.array([start or np.datetime64('NaT') for start, _ in windows], dtype='datetime64[ns]')
+    ends = np.array([end or np.datetime64('NaT') for _, end in windows], dtype='datetime64[ns]')
+    return starts, ends
+
+def to_issuance_dates(valid_start):
+    """Convert FHO valid_start values to a datetime64[D] array of issuance dates."""
+    stamps = pd.to_datetime(valid_start)
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.to_numpy().astype('datetime64[D]')
+
+# FHO issuance dates for the full archive, aligned with fho_areas rows
+fho_issuance_dates = to_issuance_dates(fho_areas['valid_start']) if fho_areas is not None else None
+
+def query_ffw_positions(verif_starts, verif_ends):
+    """Get the positions in ffws of the FFWs in effect during each verification window."""
+    if app.config['FFW_OVERLAP_INDEX']:
+        return ffw_index.query_many(verif_starts, verif_ends)
+    return [np.flatnonzero(((ffws['ISSUED'] <= end) & (ffws['EXPIRED'] >= start)).to_numpy())
+            for start, end in zip(verif_starts, verif_ends)]
+
+def select_ffws(verif_start, verif_end):
+    """Get the FFWs in effect at any time during a verification window."""
+    return ffws.iloc[query_ffw_positions([verif_start], [verif_end])[0]]
+
+def get_regional_statistics(hit_positions, miss_positions, no_tag_positions):
+    """Aggregate IBW hit/miss/no-tag FFW counts per region for each region type.
+    
+    Takes positions into ffws, so the breakdown reuses the national
+    classification and only adds a bincount per region type.
+    """
+    breakdown = {}
+    for region_type, (codes, names) in ffw_regions.items():
+        hits = np.bincount(codes[hit_positions], minlength=len(names))
+        misses = np.bincount(codes[miss_positions], minlength=len(names))
+        no_tag = np.bincount(codes[no_tag_positions], minlength=len(names))
+        breakdown[region_type] = [{
+            'region': names[i],
+            'pod': hits[i] / (hits[i] + misses[i]) if (hits[i] + misses[i]) > 0 else 0,
+            'hits': int(hits[i]),
+            'misses': int(misses[i]),
+            'ffws_no_tag': int(no_tag[i]),
+            'total_ffws': int(hits[i] + misses[i] + no_tag[i])
+        } for i in np.flatnonzero(hits + misses + no_tag)]
+    return breakdown
 
 @app.route('/')
 def index():
@@ -200,6 +416,7 @@ def get_stats():
         issuance = filters['issuance']
         forecast_period = filters['forecast_period']
         pod_threshold = float(filters.get('pod_threshold', 0.7))  # Default to 0.7 if not provided
+        compact = wants_compact()
         
         # Validate dates
         if end_date < start_date:
@@ -217,34 +434,36 @@ def get_stats():
 
         # Get all FHO areas in the date range
         date_range_filter = (
-            (pd.to_datetime(fho_areas['valid_start']).dt.date >= start_date) &
-            (pd.to_datetime(fho_areas['valid_start']).dt.date <= end_date)
+            (fho_issuance_dates >= np.datetime64(start_date)) &
+            (fho_issuance_dates <= np.datetime64(end_date))
         )
-        range_fho = fho_areas[date_range_filter & period_filter & issuance_filter & impact_filter]
+        range_filter = date_range_filter & period_filter & issuance_filter & impact_filter
+        range_fho = fho_areas[range_filter]
 
         # Initialize POD analysis variables
         total_polygons = len(range_fho)
         polygons_meeting_threshold = 0
         polygon_pods = []
 
+        # Get verification windows for every polygon in the date range in one call
+        polygon_starts, polygon_ends = get_verification_windows(
+            issuance_time, forecast_period, fho_issuance_dates[range_filter.to_numpy()])
+        polygon_ffw_positions = query_ffw_positions(polygon_starts, polygon_ends)
+
         # Calculate POD for each polygon in the date range
-        for _, polygon_row in range_fho.iterrows():
-            verif_start, verif_end = get_date_range(issuance_time, forecast_period, pd.to_datetime(polygon_row['valid_start']).date())
-            
-            if verif_start and verif_end:
+        for polygon, verif_start, verif_end, ffw_positions in zip(
+                range_fho.geometry, polygon_starts, polygon_ends, polygon_ffw_positions):
+            if not np.isnat(verif_start):
                 # Get verification data for this polygon's time window
                 period_lsrs = lsrs[
                     (lsrs['VALID'] >= verif_start) &
                     (lsrs['VALID'] < verif_end)
                 ]
                 
-                period_ffws = ffws[
-                    (ffws['ISSUED'] <= verif_end) &
-                    (ffws['EXPIRED'] >= verif_start)
-                ]
+                period_ffws = ffws.iloc[ffw_positions]
                 
                 # Calculate POD for this polygon
-                pod = calculate_pod_for_polygon(polygon_row.geometry, period_lsrs, period_ffws)
+                pod = calculate_pod_for_polygon(polygon, period_lsrs, period_ffws)
                 polygon_pods.append(pod)
                 
                 if pod >= pod_threshold:
@@ -262,7 +481,7 @@ def get_stats():
         }
 
         # First, get the map data for the selected FHO Issuance date
-        selected_date_filter = (pd.to_datetime(fho_areas['valid_start']).dt.date == start_date)
+        selected_date_filter = (fho_issuance_dates == np.datetime64(start_date))
         selected_fho = fho_areas[selected_date_filter & period_filter & issuance_filter & impact_filter]
         
         if not selected_fho.empty:
@@ -284,10 +503,7 @@ def get_stats():
                     (lsrs['VALID'] < selected_verif_end)
                 ]
                 
-                selected_ffws = ffws[
-                    (ffws['ISSUED'] <= selected_verif_end) &
-                    (ffws['EXPIRED'] >= selected_verif_start)
-                ]
+                selected_ffws = select_ffws(selected_verif_start, selected_verif_end)
                 
                 # Identify hits and misses for map display
                 map_lsrs_hit = selected_lsrs[selected_lsrs.intersects(selected_merged)]
@@ -300,25 +516,13 @@ def get_stats():
                 map_data = {
                     'fho': {
                         'type': 'Feature',
-                        'geometry': selected_merged.__geo_interface__,
+                        'geometry': geometry_to_json(selected_merged, compact),
                         'properties': {}
                     },
-                    'lsrs_hit': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for _, row in map_lsrs_hit.iterrows()]
-                    },
-                    'lsrs_miss': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for _, row in map_lsrs_miss.iterrows()]
-                    },
-                    'ffws_hit': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for _, row in map_ffws_hit.iterrows()]
-                    },
-                    'ffws_miss': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for _, row in map_ffws_miss.iterrows()]
-                    }
+                    'lsrs_hit': feature_collection(map_lsrs_hit, compact),
+                    'lsrs_miss': feature_collection(map_lsrs_miss, compact),
+                    'ffws_hit': feature_collection(map_ffws_hit, compact),
+                    'ffws_miss': feature_collection(map_ffws_miss, compact)
                 }
             else:
                 map_data = get_empty_geometries()
@@ -344,11 +548,17 @@ def get_stats():
             else:
                 end_date = start_date
 
+        # Get verification windows for every date in the range in one call
+        days = np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1, dtype='datetime64[D]')
+        day_starts, day_ends = get_verification_windows(issuance_time, forecast_period, days)
+        day_ffw_positions = query_ffw_positions(day_starts, day_ends)
+
         # Process each date in the range for statistics
-        current_date = start_date
-        while current_date <= end_date:
+        for day, verif_start, verif_end, ffw_positions in zip(days, day_starts, day_ends, day_ffw_positions):
+            current_date = day.astype(object)
+
             # Filter FHO areas for current date and issuance time
-            date_filter = (pd.to_datetime(fho_areas['valid_start']).dt.date == current_date)
+            date_filter = (fho_issuance_dates == day)
             
             # Get all FHOs for this date and issuance time
             fho_for_date = fho_areas[date_filter & issuance_filter & impact_filter]
@@ -358,10 +568,7 @@ def get_stats():
                 fho_filtered = fho_for_date[period_filter]
                 
                 if not fho_filtered.empty:
-                    # Get verification window for current date
-                    verif_start, verif_end = get_date_range(issuance_time, forecast_period, current_date)
-                    
-                    if verif_start and verif_end:
+                    if not np.isnat(verif_start):
                         # Merge FHO polygons for current date
                         merged_polygon = unary_union(fho_filtered.geometry)
                         
@@ -371,10 +578,7 @@ def get_stats():
                             (lsrs['VALID'] < verif_end)
                         ]
                         
-                        ffws_valid = ffws[
-                            (ffws['ISSUED'] <= verif_end) &
-                            (ffws['EXPIRED'] >= verif_start)
-                        ]
+                        ffws_valid = ffws.iloc[ffw_positions]
                         
                         # Identify hits and misses
                         lsrs_hit = lsrs_valid[lsrs_valid.intersects(merged_polygon)]
@@ -421,8 +625,6 @@ def get_stats():
                     'ffw_hits': 0,
                     'ffw_misses': 0
                 })
-            
-            current_date += timedelta(days=1)
         
         # Calculate cumulative statistics
         total_hits = total_lsr_hits + total_ffw_hits
@@ -448,7 +650,7 @@ def get_stats():
             'pod_analysis': pod_analysis
         }
         
-        return jsonify(response)
+        return map_response(response, compact)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -497,6 +699,112 @@ def row_to_feature(row):
         'properties': properties
     }
 
+def wants_compact():
+    """Check whether the client asked for the compact map payload format."""
+    return request.accept_mimetypes.best_match(['application/json', COMPACT_MIMETYPE]) == COMPACT_MIMETYPE
+
+def encode_positions(coords):
+    """Quantize a list of positions and delta-encode it into a flat [dx, dy, ...] list."""
+    if len(coords) == 0:
+        return []
+    quantized = np.rint(np.asarray(coords, dtype=float)[:, :2] * COORD_SCALE).astype(np.int64)
+    return np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel().tolist()
+
+def encode_geometry(geometry):
+    """Helper function to convert a shapely geometry to a quantized, delta-encoded geometry.
+
+    Points keep a single quantized [x, y] pair, every other position list is
+    flattened and delta-encoded. The client divides by COORD_SCALE to decode.
+    """
+    if geometry is None:
+        return None
+    geo = geometry.__geo_interface__
+    geom_type = geo['type']
+    if geom_type == 'GeometryCollection':
+        return {'type': geom_type, 'geometries': [encode_geometry(g) for g in geometry.geoms]}
+
+    coords = geo['coordinates']
+    if geom_type == 'Point':
+        encoded = [int(round(c * COORD_SCALE)) for c in coords[:2]]
+    elif geom_type in ('MultiPoint', 'LineString'):
+        encoded = encode_positions(coords)
+    elif geom_type in ('Polygon', 'MultiLineString'):
+        encoded = [encode_positions(ring) for ring in coords]
+    else:  # MultiPolygon
+        encoded = [[encode_positions(ring) for ring in polygon] for polygon in coords]
+    return {'type': geom_type, 'coordinates': encoded}
+
+def geometry_to_json(geometry, compact=False):
+    """Helper function to serialize a single geometry in the requested format."""
+    return encode_geometry(geometry) if compact else geometry.__geo_interface__
+
+def property_column(values):
+    """Helper function to convert a property column to JSON-safe values.
+
+    Timestamps are sent as HTTP dates, the way jsonify renders them in the
+    plain GeoJSON properties, so both formats carry identical values.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return [None if pd.isna(v) else http_date(v) for v in values]
+    values = values.astype(object).where(values.notna(), None).tolist()
+    return [None if isinstance(v, float) and np.isinf(v) else v for v in values]
+
+def compact_collection(geometries, columns):
+    """Helper function to build a compact feature collection from geometries and property columns."""
+    return {
+        'type': 'CompactFeatureCollection',
+        'columns': columns,
+        'geometries': [encode_geometry(geom) for geom in geometries]
+    }
+
+def feature_collection(gdf, compact=False):
+    """Helper function to convert a GeoDataFrame to a feature collection.
+
+    The compact format stores properties column-wise and drops the popup
+    HTML, which the client renders from the property columns instead.
+    """
+    if compact:
+        columns = {col: property_column(gdf[col]) for col in gdf.columns if col != gdf.geometry.name}
+        return compact_collection(gdf.geometry, columns)
+    return {
+        'type': 'FeatureCollection',
+        'features': [row_to_feature(row) for _, row in gdf.iterrows()]
+    }
+
+def map_response(payload, compact=False):
+    """Helper function to jsonify a map payload with the negotiated media type."""
+    if compact:
+        payload['encoding'] = {'format': 'compact', 'scale': COORD_SCALE}
+    response = jsonify(payload)
+    if compact:
+        response.mimetype = COMPACT_MIMETYPE
+    response.vary.add('Accept')
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress large JSON responses with brotli or gzip when the client accepts it."""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').endswith('json')):
+        return response
+
+    # Set even when left uncompressed so shared caches key on the encoding
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli is not None else ['gzip'])
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=5))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=6))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 @app.route('/ibw-validation')
 def ibw_validation():
     return render_template('ibw_validation.html')
@@ -510,20 +818,21 @@ def get_ibw_stats():
         issuance = filters['issuance']
         forecast_period = filters['forecast_period']
         impact_level = filters.get('impact_level', 'Considerable')  # Default to Considerable
+        compact = wants_compact()
         
         # Convert issuance format
         issuance_time = issuance.lower()
         
         # Filter FHO polygons
         fho_considerable = fho_areas[
-            (pd.to_datetime(fho_areas['valid_start']).dt.date == start_date) &
+            (fho_issuance_dates == np.datetime64(start_date)) &
             (fho_areas['issuance_time'].str.lower() == issuance_time) &
             (fho_areas['impact_level'] == 'Considerable') &
             (fho_areas['forecast_period'] == forecast_period)
         ]
         
         fho_catastrophic = fho_areas[
-            (pd.to_datetime(fho_areas['valid_start']).dt.date == start_date) &
+            (fho_issuance_dates == np.datetime64(start_date)) &
             (fho_areas['issuance_time'].str.lower() == issuance_time) &
             (fho_areas['impact_level'] == 'Catastrophic') &
             (fho_areas['forecast_period'] == forecast_period)
@@ -531,7 +840,7 @@ def get_ibw_stats():
         
         # Get Limited polygons for context
         fho_limited = fho_areas[
-            (pd.to_datetime(fho_areas['valid_start']).dt.date == start_date) &
+            (fho_issuance_dates == np.datetime64(start_date)) &
             (fho_areas['issuance_time'].str.lower() == issuance_time) &
             (fho_areas['impact_level'] == 'Limited_merged') &
             (fho_areas['forecast_period'] == forecast_period)
@@ -541,25 +850,21 @@ def get_ibw_stats():
         verif_start, verif_end = get_date_range(issuance_time, forecast_period, start_date)
         
         if verif_start and verif_end:
-            # Filter FFWs for verification window
-            ffws_valid = ffws[
-                (ffws['ISSUED'] <= verif_end) &
-                (ffws['EXPIRED'] >= verif_start)
-            ]
+            # Filter FFWs for verification window, keeping their positions for the regional breakdown
+            valid_positions = query_ffw_positions([verif_start], [verif_end])[0]
+            ffws_valid = ffws.iloc[valid_positions]
+            high_impact_mask = ffws_valid['DAMAGTAG'].isin(['CONSIDERABLE', 'CATASTROPHIC']).to_numpy()
+            impact_level_mask = (ffws_valid['DAMAGTAG'] == impact_level.upper()).to_numpy()
             
             # Get all high-impact FFWs for display
-            all_high_impact_ffws = ffws_valid[ffws_valid['DAMAGTAG'].isin(['CONSIDERABLE', 'CATASTROPHIC'])]
+            all_high_impact_ffws = ffws_valid[high_impact_mask]
             
             # Get FFWs matching selected impact level for verification
-            impact_level_ffws = ffws_valid[ffws_valid['DAMAGTAG'] == impact_level.upper()]
+            impact_level_ffws = ffws_valid[impact_level_mask]
             
             # Get FFWs with no tag
-            no_tag_ffws = ffws_valid[~ffws_valid['DAMAGTAG'].isin(['CONSIDERABLE', 'CATASTROPHIC'])]
-            
-            # Initialize hits and misses
-            hits = []
-            misses = []
-            other_impact_ffws = []  # For FFWs of different impact level
+            no_tag_ffws = ffws_valid[~high_impact_mask]
+            no_tag_positions = valid_positions[~high_impact_mask]
             
             # Use the selected impact level's polygon for verification
             fho_filtered = fho_considerable if impact_level == 'Considerable' else fho_catastrophic
@@ -581,16 +886,14 @@ def get_ibw_stats():
                     merged_polygon = unary_union([merged_polygon, cat_polygon])
                 
                 # Calculate hits and misses for selected impact level
-                for _, ffw in impact_level_ffws.iterrows():
-                    if ffw.geometry.intersects(merged_polygon):
-                        hits.append(ffw)
-                    else:
-                        misses.append(ffw)
+                hit_mask = impact_level_ffws.intersects(merged_polygon).to_numpy()
+                hits = impact_level_ffws[hit_mask]
+                misses = impact_level_ffws[~hit_mask]
+                hit_positions = valid_positions[impact_level_mask][hit_mask]
+                miss_positions = valid_positions[impact_level_mask][~hit_mask]
                 
                 # Add other impact level FFWs to separate list
-                for _, ffw in all_high_impact_ffws.iterrows():
-                    if ffw['DAMAGTAG'] != impact_level.upper():
-                        other_impact_ffws.append(ffw)
+                other_impact_ffws = all_high_impact_ffws[all_high_impact_ffws['DAMAGTAG'] != impact_level.upper()]
                 
                 # Calculate statistics
                 num_hits = len(hits)
@@ -599,18 +902,14 @@ def get_ibw_stats():
                 pod = num_hits / (num_hits + num_misses) if (num_hits + num_misses) > 0 else 0
                 
                 # Prepare map features
-                map_data = {
-                    'fho_considerable': {
-                        'type': 'Feature',
-                        'geometry': unary_union(fho_considerable.geometry).__geo_interface__ if not fho_considerable.empty else None,
-                        'properties': {'type': 'Considerable'}
-                    },
-                    'fho_catastrophic': {
-                        'type': 'Feature',
-                        'geometry': unary_union(fho_catastrophic.geometry).__geo_interface__ if not fho_catastrophic.empty else None,
-                        'properties': {'type': 'Catastrophic'}
-                    },
-                    'limited': {
+                if compact:
+                    limited_data = compact_collection(fho_limited.geometry, {
+                        'type': ['Limited'] * len(fho_limited),
+                        'issuance_time': [issuance_time] * len(fho_limited),
+                        'forecast_period': [forecast_period] * len(fho_limited)
+                    })
+                else:
+                    limited_data = {
                         'type': 'FeatureCollection',
                         'features': [{'type': 'Feature', 
                                     'geometry': geom.__geo_interface__, 
@@ -620,27 +919,30 @@ def get_ibw_stats():
                                         'forecast_period': forecast_period
                                     }} 
                                    for geom in fho_limited.geometry] if not fho_limited.empty else []
+                    }
+
+                map_data = {
+                    'fho_considerable': {
+                        'type': 'Feature',
+                        'geometry': geometry_to_json(unary_union(fho_considerable.geometry), compact) if not fho_considerable.empty else None,
+                        'properties': {'type': 'Considerable'}
                     },
-                    'hits': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for row in hits]
-                    },
-                    'misses': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for row in misses]
-                    },
-                    'other_impact': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for row in other_impact_ffws]
+                    'fho_catastrophic': {
+                        'type': 'Feature',
+                        'geometry': geometry_to_json(unary_union(fho_catastrophic.geometry), compact) if not fho_catastrophic.empty else None,
+                        'properties': {'type': 'Catastrophic'}
                     },
-                    'no_tag': {
-                        'type': 'FeatureCollection',
-                        'features': [row_to_feature(row) for _, row in no_tag_ffws.iterrows()]
-                    }
+                    'limited': limited_data,
+                    'hits': feature_collection(hits, compact),
+                    'misses': feature_collection(misses, compact),
+                    'other_impact': feature_collection(other_impact_ffws, compact),
+                    'no_tag': feature_collection(no_tag_ffws, compact)
                 }
             else:
                 # If no FHO polygon, all high-impact FFWs are misses
                 misses = all_high_impact_ffws
+                hit_positions = valid_positions[:0]
+                miss_positions = valid_positions[high_impact_mask]
                 num_hits = 0
                 num_misses = len(misses)
                 num_no_tag = len(no_tag_ffws)
@@ -655,6 +957,7 @@ def get_ibw_stats():
                     'ffws_no_tag': num_no_tag,
                     'total_ffws': num_hits + num_misses + num_no_tag
                 },
+                'regional_statistics': get_regional_statistics(hit_positions, miss_positions, no_tag_positions),
                 'geometries': map_data,
                 'verification_window': {
                     'start': verif_start.isoformat(),
@@ -662,7 +965,7 @@ def get_ibw_stats():
                 }
             }
             
-            return jsonify(response)
+            return map_response(response, compact)
         else:
             return jsonify({'error': 'Invalid verification window'}), 400
             
@@ -0,0 +1,89 @@
+"""Benchmark FFW verification-window overlap queries: boolean mask vs interval index.
+
+Builds every verification window the app can ask for (all FHO issuance dates
+x AM/PM x forecast period) and answers each one three ways: the full-column
+mask the endpoints used to run, IntervalOverlapIndex.query per window, and
+IntervalOverlapIndex.query_many for the whole batch. Every answer is checked
+against the mask before timings are reported.
+
+The run is repeated with the earliest warning's EXPIRED pushed ten years out.
+That one outlier must not slow the index down: long intervals are kept in a
+side list instead of widening every later query.
+
+Run from the directory holding the data files:
+
+    python benchmarks/bench_ffw_overlap.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as fho_app  # noqa: E402  (loads the data files on import)
+
+def all_windows():
+    """Get start/end arrays for every issuance date x issuance x forecast period."""
+    dates = np.unique(fho_app.fho_issuance_dates[~np.isnat(fho_app.fho_issuance_dates)])
+    combos = [(issuance, period) for issuance in fho_app.ISSUANCE_HOURS_UTC for period in fho_app.FORECAST_PERIOD_DAYS]
+    issuance_times = np.repeat([c[0] for c in combos], len(dates))
+    periods = np.repeat([c[1] for c in combos], len(dates))
+    return fho_app.get_date_ranges(issuance_times, periods, np.tile(dates, len(combos)))
+
+def timed(func, repeat):
+    """Return (best seconds, result) over several runs of func."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def compare(issued, expired, starts, ends, repeat):
+    """Check the index against the mask for every window and print the timings."""
+    build_time, index = timed(lambda: fho_app.IntervalOverlapIndex(issued, expired), repeat)
+    print(f"Index built in {build_time * 1000:.1f} ms, {len(index.long_positions):,} intervals "
+          f"longer than {index.cap / np.timedelta64(1, 'h'):.1f} h in the side list")
+
+    mask_time, expected = timed(lambda: [np.flatnonzero(((issued <= end) & (expired >= start)).to_numpy())
+                                         for start, end in zip(starts, ends)], repeat)
+    query_time, per_window = timed(lambda: [index.query(start, end) for start, end in zip(starts, ends)], repeat)
+    batch_time, batched = timed(lambda: index.query_many(starts, ends), repeat)
+
+    for want, got_single, got_batch in zip(expected, per_window, batched):
+        if not (np.array_equal(want, got_single) and np.array_equal(want, got_batch)):
+            sys.exit("Interval index results differ from the boolean mask")
+
+    matches = sum(len(positions) for positions in expected)
+    print(f"All {len(starts):,} windows match the mask ({matches:,} FFW matches in total)\n")
+    print(f"{'method':<24}{'total ms':>12}{'us/window':>12}{'speedup':>10}")
+    for name, elapsed in (('boolean mask', mask_time), ('index.query', query_time), ('index.query_many', batch_time)):
+        print(f"{name:<24}{elapsed * 1000:>12.1f}{elapsed / len(starts) * 1e6:>12.1f}{mask_time / elapsed:>9.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ffws = fho_app.ffws
+    if ffws is None:
+        sys.exit("No FFW data loaded; run from the directory holding the data files.")
+
+    starts, ends = all_windows()
+    print(f"{len(ffws):,} FFWs, {len(starts):,} verification windows\n")
+    compare(ffws['ISSUED'], ffws['EXPIRED'], starts, ends, args.repeat)
+
+    print("\nWith one ten-year warning at the start of the record")
+    expired = ffws['EXPIRED'].copy()
+    earliest = ffws['ISSUED'].to_numpy().argmin()
+    expired.iloc[earliest] = ffws['ISSUED'].iloc[earliest] + pd.Timedelta(days=3650)
+    compare(ffws['ISSUED'], expired, starts, ends, args.repeat)
+
+if __name__ == '__main__':
+    main()
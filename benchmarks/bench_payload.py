@@ -0,0 +1,209 @@
+"""Benchmark map payload size and client-side decode time per wire format.
+
+Runs /api/stats and /api/ibw-stats through the Flask test client for a set of
+dates and compares plain GeoJSON against the compact format, each with and
+without gzip/brotli.
+
+"node ms" is the browser-side cost: JSON.parse plus static/js/compact.js's
+decodeMapPayload, timed under node. Decompression is left out because
+browsers do it natively. "py ms" times a Python mirror of the decoder
+(decompression, json.loads and decoding). It is only a consistency check.
+Python walks the decoded lists far more slowly than a JS engine, so it can
+rank the compact format slower than plain GeoJSON. The node column is
+skipped when node is not installed.
+
+Run from the directory holding the data files:
+
+    python benchmarks/bench_payload.py --dates 2024-07-10 2024-08-09
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as fho_app  # noqa: E402  (loads the data files on import)
+
+COMPACT_JS = os.path.join(ROOT, 'static', 'js', 'compact.js')
+
+# Times JSON.parse + decodeMapPayload for each payload file; prints median ms per file
+NODE_TIMER = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [compactJs, repeat, ...files] = process.argv.slice(1);
+vm.runInThisContext(fs.readFileSync(compactJs, 'utf8'));
+const medians = files.map((file) => {
+    const text = fs.readFileSync(file, 'utf8');
+    const times = [];
+    for (let i = 0; i < Number(repeat); i++) {
+        const start = performance.now();
+        decodeMapPayload(JSON.parse(text));
+        times.push(performance.now() - start);
+    }
+    times.sort((a, b) => a - b);
+    return times[Math.floor(times.length / 2)];
+});
+console.log(JSON.stringify(medians));
+"""
+
+VARIANTS = [
+    ('geojson', 'application/json', 'identity'),
+    ('geojson+gzip', 'application/json', 'gzip'),
+    ('geojson+br', 'application/json', 'br'),
+    ('compact', fho_app.COMPACT_MIMETYPE, 'identity'),
+    ('compact+gzip', fho_app.COMPACT_MIMETYPE, 'gzip'),
+    ('compact+br', fho_app.COMPACT_MIMETYPE, 'br'),
+]
+
+def decode_positions(deltas, scale):
+    """Decode a flat [dx, dy, ...] delta list into positions."""
+    positions = []
+    x = y = 0
+    for i in range(0, len(deltas), 2):
+        x += deltas[i]
+        y += deltas[i + 1]
+        positions.append([x / scale, y / scale])
+    return positions
+
+def decode_geometry(geometry, scale):
+    """Decode a quantized geometry back to GeoJSON."""
+    if geometry is None:
+        return None
+    geom_type = geometry['type']
+    if geom_type == 'GeometryCollection':
+        return {'type': geom_type, 'geometries': [decode_geometry(g, scale) for g in geometry['geometries']]}
+    coords = geometry['coordinates']
+    if geom_type == 'Point':
+        decoded = [coords[0] / scale, coords[1] / scale]
+    elif geom_type in ('MultiPoint', 'LineString'):
+        decoded = decode_positions(coords, scale)
+    elif geom_type in ('Polygon', 'MultiLineString'):
+        decoded = [decode_positions(ring, scale) for ring in coords]
+    else:
+        decoded = [[decode_positions(ring, scale) for ring in polygon] for polygon in coords]
+    return {'type': geom_type, 'coordinates': decoded}
+
+def decode_payload(data):
+    """Decode a compact map payload in place, mirroring decodeMapPayload()."""
+    if data.get('encoding', {}).get('format') != 'compact':
+        return data
+    scale = data['encoding']['scale']
+    for key, value in data['geometries'].items():
+        if value and value.get('type') == 'CompactFeatureCollection':
+            columns = value['columns']
+            data['geometries'][key] = {
+                'type': 'FeatureCollection',
+                'features': [{
+                    'type': 'Feature',
+                    'geometry': decode_geometry(geom, scale),
+                    'properties': {name: values[i] for name, values in columns.items()}
+                } for i, geom in enumerate(value['geometries'])]
+            }
+        elif value and value.get('type') == 'Feature':
+            value['geometry'] = decode_geometry(value['geometry'], scale)
+    return data
+
+def decompress(body, encoding):
+    """Undo the Content-Encoding of a response body."""
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        return fho_app.brotli.decompress(body)
+    return body
+
+def measure(client, endpoint, body, accept, accept_encoding, repeat):
+    """Return (bytes on wire, median server ms, median Python client ms, decoded body) for one variant."""
+    server_times, client_times = [], []
+    size = text = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.post(endpoint, json=body, headers={
+            'Accept': accept,
+            'Accept-Encoding': accept_encoding
+        })
+        server_times.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} returned {response.status_code}: {response.get_data()[:200]!r}")
+        payload = response.get_data()
+        size = len(payload)
+
+        start = time.perf_counter()
+        text = decompress(payload, response.headers.get('Content-Encoding'))
+        decode_payload(json.loads(text))
+        client_times.append(time.perf_counter() - start)
+    return size, statistics.median(server_times) * 1000, statistics.median(client_times) * 1000, text
+
+def node_decode_times(bodies, repeat):
+    """Time JSON.parse + decodeMapPayload under node for each body; return median ms, or None without node."""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i, text in enumerate(bodies):
+            files.append(os.path.join(tmp, f'{i}.json'))
+            with open(files[-1], 'wb') as f:
+                f.write(text)
+        output = subprocess.run([node, '-e', NODE_TIMER, COMPACT_JS, str(repeat), *files],
+                                check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dates', nargs='*', help='FHO issuance dates (default: the first 5 available)')
+    parser.add_argument('--period', default='1-3', choices=['1-3', '4-7', '1-7'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--node-repeat', type=int, default=20, help='Decode runs per payload under node')
+    args = parser.parse_args()
+
+    client = fho_app.app.test_client()
+    dates = args.dates or client.get('/api/available-dates').get_json()[:5]
+    if not dates:
+        sys.exit("No FHO data loaded; run from the directory holding the data files.")
+
+    variants = [v for v in VARIANTS if v[2] != 'br' or fho_app.brotli is not None]
+    cases = []
+    for date in dates:
+        cases.append(('/api/stats', {'issuance_date': date, 'issuance': '00Z', 'forecast_period': args.period}))
+        cases.append(('/api/ibw-stats', {'issuance_date': date, 'issuance': 'AM', 'forecast_period': args.period,
+                                        'impact_level': 'Considerable'}))
+
+    # Every variant of a format decodes the same body, so node times each (case, format) once
+    rows, bodies = [], {}
+    for case_number, (endpoint, body) in enumerate(cases):
+        for name, accept, accept_encoding in variants:
+            size, server_ms, client_ms, text = measure(client, endpoint, body, accept, accept_encoding, args.repeat)
+            bodies.setdefault((case_number, accept), text)
+            rows.append((case_number, endpoint, body, name, accept, size, server_ms, client_ms))
+
+    node_times = node_decode_times(list(bodies.values()), args.node_repeat)
+    node_ms = dict(zip(bodies, node_times)) if node_times is not None else {}
+    if node_times is None:
+        print("node not found; skipping the node ms column\n")
+
+    totals = {name: [0, 0.0, 0.0, 0.0] for name, _, _ in variants}
+    print(f"{'endpoint':<16}{'date':<12}{'variant':<14}{'bytes':>12}{'server ms':>12}{'node ms':>10}{'py ms':>10}")
+    for case_number, endpoint, body, name, accept, size, server_ms, client_ms in rows:
+        decode_ms = node_ms.get((case_number, accept), float('nan'))
+        for i, value in enumerate((size, server_ms, decode_ms, client_ms)):
+            totals[name][i] += value
+        print(f"{endpoint:<16}{body['issuance_date']:<12}{name:<14}{size:>12,}{server_ms:>12.1f}"
+              f"{decode_ms:>10.2f}{client_ms:>10.1f}")
+
+    baseline_bytes, _, baseline_node, baseline_client = totals['geojson']
+    print("\nTotals")
+    print(f"{'variant':<14}{'bytes':>14}{'vs geojson':>12}{'server ms':>12}{'node ms':>10}{'vs geojson':>12}{'py ms':>10}")
+    for name, (size, server_ms, decode_ms, client_ms) in totals.items():
+        print(f"{name:<14}{size:>14,}{size / baseline_bytes:>11.1%} {server_ms:>11.1f}{decode_ms:>10.2f}"
+              f"{decode_ms / baseline_node if baseline_node else 0:>11.1%} {client_ms:>9.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""Golden-output regression harness for the statistics endpoints.
+
+`record` runs a fixed request matrix through the Flask test client and
+snapshots every full JSON response. `check` replays the same matrix with each
+engine and compares every response with the snapshot. Timings are shown side
+by side, so a speedup and its equivalence are proven in the same run.
+
+The matrix covers /api/available-dates, /api/high-impact-events, and, for each
+sampled issuance date, /api/stats (00Z/12Z x forecast period x POD threshold,
+plus end-date ranges) and /api/ibw-stats (AM/PM x forecast period x impact
+level). Half of the dates come from the Quick Select events, so IBW cases with
+high-impact FFWs are always included. calculate_pod_for_polygon is covered
+through the POD threshold counts in /api/stats.
+
+Without --data-dir the snapshot uses a synthetic dataset (see
+synthetic_data.py). `check` regenerates it from the parameters stored in the
+snapshot. A small synthetic snapshot of the reference engine is committed as
+benchmarks/golden/synthetic.json.gz and checked by default. Re-record it only
+when a change to the responses is intended:
+
+    python benchmarks/golden.py check
+    python benchmarks/golden.py record benchmarks/golden/synthetic.json.gz \
+        --days 10 --lsrs-per-day 20 --ffws-per-day 15 --dates 2
+    python benchmarks/golden.py record golden/real.json.gz --data-dir /data/fho --dates 12
+    python benchmarks/golden.py check golden/real.json.gz
+
+To check a new implementation, add it to ENGINES. An engine is a set of
+app.config overrides plus the number of concurrent clients.
+
+The `reference` engine is the current get_stats with VECTORIZED_WINDOWS and
+FFW_OVERLAP_INDEX turned off. It is not the pre-optimization code: changes
+shared by every engine would only be compared against themselves. So `check`
+also loads app.py from BASELINE_REVISION (the last commit before the
+performance work) with `git show`. It compares the fields both versions
+return: statistics, pod_analysis, verification_window and the properties of
+every map feature, ignoring row order. Use --no-baseline outside a git
+checkout.
+"""
+import argparse
+import gzip
+import importlib.util
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic_data  # noqa: E402
+
+# Engines to check against the snapshot, in report order
+ENGINES = {
+    'reference': {
+        'description': 'Per-date windows, full-column FFW masks',
+        'config': {'VECTORIZED_WINDOWS': False, 'FFW_OVERLAP_INDEX': False},
+        'clients': 1
+    },
+    'vectorized': {
+        'description': 'Vectorized windows, full-column FFW masks',
+        'config': {'VECTORIZED_WINDOWS': True, 'FFW_OVERLAP_INDEX': False},
+        'clients': 1
+    },
+    'indexed': {
+        'description': 'Vectorized windows, interval index (default)',
+        'config': {'VECTORIZED_WINDOWS': True, 'FFW_OVERLAP_INDEX': True},
+        'clients': 1
+    },
+    'parallel': {
+        'description': 'Default engine, cases run from concurrent clients',
+        'config': {'VECTORIZED_WINDOWS': True, 'FFW_OVERLAP_INDEX': True},
+        'clients': 4
+    }
+}
+
+# Last commit before the performance work; `check` also runs its app.py
+BASELINE_REVISION = '2b6ecd3'
+
+# Small synthetic snapshot kept in the repository, checked by default
+DEFAULT_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'synthetic.json.gz')
+
+STATS_ISSUANCES = ['00Z', '12Z']
+IBW_ISSUANCES = ['AM', 'PM']
+FORECAST_PERIODS = ['1-3', '4-7', '1-7']
+IMPACT_LEVELS = ['Considerable', 'Catastrophic']
+POD_THRESHOLDS = [0.02, 0.05, 0.1, 0.5]  # Per-polygon POD is mostly below 0.1
+END_DATE_OFFSETS = [2, 6]  # Days after the issuance date for range requests
+
+def prepare_data(dataset, work_dir):
+    """Get the data directory for a dataset description, generating synthetic data if needed."""
+    if 'data_dir' in dataset:
+        return dataset['data_dir']
+    params = dataset['synthetic']
+    print(f"Generating {params['days']} days of synthetic data (seed {params['seed']})...")
+    synthetic_data.generate(work_dir, start_date=params['start_date'], days=params['days'],
+                            lsrs_per_day=params['lsrs_per_day'], ffws_per_day=params['ffws_per_day'],
+                            seed=params['seed'])
+    return work_dir
+
+def load_app(data_dir):
+    """Import app.py with data_dir as the working directory, loading its data files."""
+    os.chdir(data_dir)
+    import app as fho_app
+    if fho_app.fho_areas is None:
+        sys.exit(f"No data loaded from {data_dir}")
+    return fho_app
+
+def load_baseline_app(revision):
+    """Import app.py as of a git revision under another module name, loading its own copy of the data.
+
+    Must run after load_app, so the data files are in the working directory.
+    Returns None when the revision cannot be read.
+    """
+    result = subprocess.run(['git', '-C', ROOT, 'show', f'{revision}:app.py'], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Skipping the baseline engine: could not read app.py at {revision}: {result.stderr.strip()}")
+        return None
+    path = os.path.join(tempfile.mkdtemp(prefix='fho-baseline-'), 'baseline_app.py')
+    with open(path, 'w') as f:
+        f.write(result.stdout)
+    spec = importlib.util.spec_from_file_location('fho_baseline_app', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def feature_keys(collection):
+    """Get a sorted list of feature property sets, ignoring geometry, popup HTML and row order."""
+    if not isinstance(collection, dict):
+        return collection
+    features = collection.get('features', [collection] if collection.get('type') == 'Feature' else [])
+    return sorted(json.dumps({k: v for k, v in (feature.get('properties') or {}).items() if k != 'popup_content'},
+                             sort_keys=True) for feature in features)
+
+def shared_fields(case, body):
+    """Reduce a response to the fields the baseline app.py also returns, independent of row order.
+
+    The baseline loads layers in completion order, so lists of features and
+    events are compared as sorted multisets, and map geometries only through
+    the properties of their features.
+    """
+    if not isinstance(body, dict) or 'error' in body:
+        return body
+    if case['path'] == '/api/high-impact-events':
+        return {key: sorted(json.dumps(item, sort_keys=True) for item in items) for key, items in body.items()}
+    if case['path'] in ('/api/stats', '/api/ibw-stats'):
+        view = {key: body[key] for key in ('statistics', 'pod_analysis', 'verification_window') if key in body}
+        view['features'] = {name: feature_keys(collection) for name, collection in body.get('geometries', {}).items()}
+        return view
+    return body
+
+def find_mismatches(cases, results, rel_tol, view=None):
+    """Compare engine results with the snapshot; return [(case id, difference)]."""
+    mismatches = []
+    for case, (status, body, _) in zip(cases, results):
+        if status != case['status']:
+            mismatches.append((case['id'], f"status {case['status']} != {status}"))
+            continue
+        expected = view(case, case['response']) if view else case['response']
+        actual = view(case, body) if view else body
+        difference = first_difference(expected, actual, rel_tol=rel_tol)
+        if difference:
+            mismatches.append((case['id'], difference))
+    return mismatches
+
+def call(fho_app, case):
+    """Run one case through a fresh test client and return (status, JSON body, seconds)."""
+    client = fho_app.app.test_client()
+    start = time.perf_counter()
+    response = client.open(case['path'], method=case['method'], json=case['body'])
+    elapsed = time.perf_counter() - start
+    return response.status_code, response.get_json(), elapsed
+
+def sample_dates(fho_app, count, seed):
+    """Pick issuance dates, half from the Quick Select events and half from all dates."""
+    client = fho_app.app.test_client()
+    dates = client.get('/api/available-dates').get_json()
+    events = client.get('/api/high-impact-events').get_json()
+    event_dates = sorted({event['date'] for key in ('considerable_fho', 'catastrophic_fho')
+                          for event in events.get(key, [])})
+
+    rng = random.Random(seed)
+    chosen = set(rng.sample(event_dates, min(len(event_dates), count // 2)))
+    remaining = sorted(set(dates) - chosen)
+    chosen.update(rng.sample(remaining, min(len(remaining), count - len(chosen))))
+    return sorted(chosen)
+
+def build_cases(dates):
+    """Build the request matrix for the sampled issuance dates."""
+    cases = [
+        {'method': 'GET', 'path': '/api/available-dates', 'body': None},
+        {'method': 'GET', 'path': '/api/high-impact-events', 'body': None}
+    ]
+    for date in dates:
+        for issuance in STATS_ISSUANCES:
+            for period in FORECAST_PERIODS:
+                for threshold in POD_THRESHOLDS:
+                    body = {'issuance_date': date, 'issuance': issuance,
+                            'forecast_period': period, 'pod_threshold': threshold}
+                    cases.append({'method': 'POST', 'path': '/api/stats', 'body': body})
+                for offset in END_DATE_OFFSETS:
+                    end_date = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=offset)).strftime('%Y-%m-%d')
+                    body = {'issuance_date': date, 'end_date': end_date, 'issuance': issuance,
+                            'forecast_period': period, 'pod_threshold': 0.5}
+                    cases.append({'method': 'POST', 'path': '/api/stats', 'body': body})
+        for issuance in IBW_ISSUANCES:
+            for period in FORECAST_PERIODS:
+                for impact_level in IMPACT_LEVELS:
+                    body = {'issuance_date': date, 'issuance': issuance,
+                            'forecast_period': period, 'impact_level': impact_level}
+                    cases.append({'method': 'POST', 'path': '/api/ibw-stats', 'body': body})
+
+    for case in cases:
+        case['id'] = f"{case['method']} {case['path']} {json.dumps(case['body'], sort_keys=True)}"
+    return cases
+
+def run_engine(fho_app, engine, cases):
+    """Run every case with an engine's config; return ([(status, body, seconds)], wall seconds)."""
+    saved = {key: fho_app.app.config.get(key) for key in engine['config']}
+    fho_app.app.config.update(engine['config'])
+    try:
+        start = time.perf_counter()
+        if engine['clients'] > 1:
+            with ThreadPoolExecutor(max_workers=engine['clients']) as executor:
+                results = list(executor.map(lambda case: call(fho_app, case), cases))
+        else:
+            results = [call(fho_app, case) for case in cases]
+        return results, time.perf_counter() - start
+    finally:
+        fho_app.app.config.update(saved)
+
+def first_difference(expected, actual, path='', rel_tol=1e-9):
+    """Describe the first difference between two JSON values, or return None if they match.
+
+    Numbers compare with a relative tolerance, so reordered floating-point sums
+    still match. Everything else, including list order, must be identical.
+    """
+    numbers = (int, float)
+    if isinstance(expected, numbers) and isinstance(actual, numbers) \
+            and not isinstance(expected, bool) and not isinstance(actual, bool):
+        if math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=1e-12):
+            return None
+        return f"{path or '/'}: {expected!r} != {actual!r}"
+    if type(expected) is not type(actual):
+        return f"{path or '/'}: {type(expected).__name__} != {type(actual).__name__}"
+    if isinstance(expected, dict):
+        if expected.keys() != actual.keys():
+            return f"{path or '/'}: keys {sorted(expected.keys() ^ actual.keys())} differ"
+        for key in expected:
+            difference = first_difference(expected[key], actual[key], f"{path}/{key}", rel_tol)
+            if difference:
+                return difference
+        return None
+    if isinstance(expected, list):
+        if len(expected) != len(actual):
+            return f"{path or '/'}: length {len(expected)} != {len(actual)}"
+        for i, (want, got) in enumerate(zip(expected, actual)):
+            difference = first_difference(want, got, f"{path}/{i}", rel_tol)
+            if difference:
+                return difference
+        return None
+    return None if expected == actual else f"{path or '/'}: {expected!r} != {actual!r}"
+
+def record(args):
+    """Run the request matrix and write the snapshot."""
+    work_dir = tempfile.mkdtemp(prefix='fho-golden-')
+    if args.data_dir:
+        dataset = {'data_dir': os.path.abspath(args.data_dir)}
+    else:
+        dataset = {'synthetic': {'start_date': args.start_date, 'days': args.days, 'lsrs_per_day': args.lsrs_per_day,
+                                 'ffws_per_day': args.ffws_per_day, 'seed': args.seed}}
+    output = os.path.abspath(args.snapshot)
+    fho_app = load_app(prepare_data(dataset, work_dir))
+
+    engine = ENGINES[args.engine]
+    cases = build_cases(sample_dates(fho_app, args.dates, args.seed))
+    print(f"Recording {len(cases)} cases with the {args.engine} engine...")
+    results, wall = run_engine(fho_app, engine, cases)
+
+    errors = 0
+    for case, (status, body, seconds) in zip(cases, results):
+        case.update({'status': status, 'response': body, 'seconds': seconds})
+        if status != 200:
+            errors += 1
+            print(f"  {status} {case['id']}: {body}")
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with gzip.open(output, 'wt') as f:
+        json.dump({'dataset': dataset, 'engine': args.engine, 'cases': cases}, f, separators=(',', ':'))
+    print(f"Wrote {len(cases)} responses ({errors} non-200) to {output} in {wall:.1f} s")
+
+def check(args):
+    """Replay the snapshot's request matrix with each engine and compare the responses."""
+    with gzip.open(args.snapshot, 'rt') as f:
+        snapshot = json.load(f)
+    dataset = {'data_dir': os.path.abspath(args.data_dir)} if args.data_dir else snapshot['dataset']
+    fho_app = load_app(prepare_data(dataset, tempfile.mkdtemp(prefix='fho-golden-')))
+
+    # (name, app module, engine, comparison view) for every engine to run
+    runs = [(name, fho_app, ENGINES[name], None) for name in args.engines]
+    if args.baseline:
+        baseline_app = load_baseline_app(args.baseline)
+        if baseline_app is not None:
+            engine = {'description': f'app.py at {args.baseline} (shared fields only)', 'config': {}, 'clients': 1}
+            runs.insert(0, ('baseline', baseline_app, engine, shared_fields))
+
+    cases = snapshot['cases']
+    print(f"Checking {len(cases)} cases recorded with the {snapshot['engine']} engine\n")
+    timings = {'golden': [case['seconds'] for case in cases]}
+    summary = []
+    failed = False
+    for name, module, engine, view in runs:
+        results, wall = run_engine(module, engine, cases)
+        mismatches = find_mismatches(cases, results, args.rel_tol, view)
+
+        timings[name] = [seconds for _, _, seconds in results]
+        summary.append((name, engine, len(mismatches), wall))
+        failed = failed or bool(mismatches)
+        for case_id, difference in mismatches[:args.show]:
+            print(f"  {name} mismatch: {case_id}\n    {difference}")
+        if len(mismatches) > args.show:
+            print(f"  ... {len(mismatches) - args.show} more {name} mismatches")
+
+    golden_total = sum(timings['golden'])
+    print(f"\n{'engine':<12}{'description':<52}{'mismatches':>12}{'wall s':>10}{'speedup':>10}")
+    print(f"{'golden':<12}{'recorded run':<52}{'':>12}{golden_total:>10.2f}{1:>9.2f}x")
+    for name, engine, mismatch_count, wall in summary:
+        print(f"{name:<12}{engine['description']:<52}{mismatch_count:>12}{wall:>10.2f}{golden_total / wall:>9.2f}x")
+
+    print("\nMedian ms per case by endpoint")
+    paths = sorted({case['path'] for case in cases})
+    print(f"{'endpoint':<26}{'cases':>7}" + ''.join(f"{name:>12}" for name in timings))
+    for path in paths:
+        positions = [i for i, case in enumerate(cases) if case['path'] == path]
+        row = ''.join(f"{statistics.median(timings[name][i] for i in positions) * 1000:>12.1f}" for name in timings)
+        print(f"{path:<26}{len(positions):>7}{row}")
+
+    if failed:
+        sys.exit("\nResponses differ from the golden snapshot")
+    print("\nAll engines match the golden snapshot")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Snapshot the responses of the request matrix')
+    record_parser.add_argument('snapshot', help='Path to write the snapshot (.json.gz)')
+    record_parser.add_argument('--data-dir', help='Directory with the .gpkg files (default: generate a synthetic dataset)')
+    record_parser.add_argument('--start-date', default='2024-06-01', help='First day of synthetic data')
+    record_parser.add_argument('--days', type=int, default=20, help='Days of synthetic data to generate')
+    record_parser.add_argument('--lsrs-per-day', type=int, default=60, help='Synthetic LSRs per day')
+    record_parser.add_argument('--ffws-per-day', type=int, default=40, help='Synthetic flood warnings per day')
+    record_parser.add_argument('--dates', type=int, default=6, help='Number of issuance dates to sample')
+    record_parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data and date sample')
+    record_parser.add_argument('--engine', choices=ENGINES, default='reference', help='Engine to record with')
+
+    check_parser = subparsers.add_parser('check', help='Compare each engine with a snapshot')
+    check_parser.add_argument('snapshot', nargs='?', default=DEFAULT_SNAPSHOT,
+                              help='Snapshot written by record (default: the committed synthetic snapshot)')
+    check_parser.add_argument('--data-dir', help='Override the data directory stored in the snapshot')
+    check_parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    check_parser.add_argument('--baseline', default=BASELINE_REVISION, metavar='REVISION',
+                              help='Git revision of the pre-optimization app.py to compare shared fields with')
+    check_parser.add_argument('--no-baseline', dest='baseline', action='store_const', const=None,
+                              help='Skip the baseline engine')
+    check_parser.add_argument('--rel-tol', type=float, default=1e-9, help='Relative tolerance for numbers')
+    check_parser.add_argument('--show', type=int, default=5, help='Mismatches to print per engine')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args)
+    else:
+        check(args)
+
+if __name__ == '__main__':
+    main()
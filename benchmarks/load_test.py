@@ -0,0 +1,320 @@
+"""Load test the app under gunicorn across worker/thread/worker-class settings.
+
+For every configuration in the sweep this launches gunicorn with
+gunicorn.conf.py plus command-line overrides, waits until the data is loaded,
+then replays a weighted mix of /api/available-dates, /api/high-impact-events,
+/api/stats and /api/ibw-stats requests at each concurrency level. It reports
+throughput, latency percentiles, errors and the memory of the gunicorn
+process tree (PSS, so pages shared by preload_app are not double counted).
+
+Without --data-dir a synthetic dataset is generated first (see
+synthetic_data.py), so the harness runs without the real archive:
+
+    python benchmarks/load_test.py --workers 2 5 --threads 1 4 --concurrency 4 16
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic_data  # noqa: E402
+
+# Default share of each endpoint in the replayed traffic
+DEFAULT_MIX = {
+    'available-dates': 0.1,
+    'high-impact-events': 0.1,
+    'stats': 0.5,
+    'ibw-stats': 0.3
+}
+
+def free_port():
+    """Get a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def process_tree(pid):
+    """Get pid and all of its descendants from /proc."""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; ppid follows the closing paren
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    tree, queue = [], [pid]
+    while queue:
+        current = queue.pop()
+        tree.append(current)
+        queue.extend(parents.get(current, []))
+    return tree
+
+def process_memory_kb(pid):
+    """Get the proportional set size of a process in kB, falling back to RSS."""
+    for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+class MemorySampler(threading.Thread):
+    """Sample the memory of a process tree in the background."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.samples.append(sum(process_memory_kb(p) for p in process_tree(self.pid)) / 1024)
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return max(self.samples, default=0), statistics.mean(self.samples) if self.samples else 0
+
+def start_server(data_dir, port, workers, threads, worker_class, log_path):
+    """Launch gunicorn for one configuration, serving the data files in data_dir."""
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--config', os.path.join(ROOT, 'gunicorn.conf.py'),
+        '--pythonpath', ROOT,
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--worker-class', worker_class,
+        '--access-logfile', os.devnull,
+        'app:app'
+    ]
+    log = open(log_path, 'w')
+    return subprocess.Popen(command, cwd=data_dir, stdout=log, stderr=subprocess.STDOUT)
+
+def wait_until_ready(base_url, server, timeout):
+    """Wait until the app answers with a non-empty list of dates."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        try:
+            response = requests.get(f'{base_url}/api/available-dates', timeout=5)
+            if response.ok and response.json():
+                return response.json()
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"App did not become ready within {timeout}s")
+
+def stop_server(server):
+    """Stop gunicorn gracefully, killing it if it does not exit."""
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+def build_requests(base_url, dates, mix, count, seed):
+    """Build a reproducible sequence of (endpoint name, method, url, json body) requests.
+
+    Stats requests pick a random date, issuance and forecast period, with an
+    end date in a third of them. IBW requests mostly replay Quick Select
+    events, the way users reach that page.
+    """
+    rng = random.Random(seed)
+    events = requests.get(f'{base_url}/api/high-impact-events', timeout=60).json()
+    ibw_events = [(event, 'Considerable') for event in events.get('considerable_fho', [])]
+    ibw_events += [(event, 'Catastrophic') for event in events.get('catastrophic_fho', [])]
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    sequence = []
+    for name in rng.choices(names, weights, k=count):
+        if name in ('available-dates', 'high-impact-events'):
+            sequence.append((name, 'GET', f'{base_url}/api/{name}', None))
+        elif name == 'stats':
+            index = rng.randrange(len(dates))
+            body = {
+                'issuance_date': dates[index],
+                'issuance': rng.choice(['00Z', '12Z']),
+                'forecast_period': rng.choice(['1-3', '4-7', '1-7']),
+                'pod_threshold': rng.choice([0.5, 0.7, 0.9])
+            }
+            if rng.random() < 1 / 3:
+                body['end_date'] = dates[min(index + rng.randrange(1, 8), len(dates) - 1)]
+            sequence.append((name, 'POST', f'{base_url}/api/stats', body))
+        else:
+            if ibw_events and rng.random() < 0.8:
+                event, impact_level = rng.choice(ibw_events)
+                body = {'issuance_date': event['date'], 'issuance': event['issuance'].upper(),
+                        'forecast_period': event['period'], 'impact_level': impact_level}
+            else:
+                body = {'issuance_date': rng.choice(dates), 'issuance': rng.choice(['AM', 'PM']),
+                        'forecast_period': rng.choice(['1-3', '4-7', '1-7']),
+                        'impact_level': rng.choice(['Considerable', 'Catastrophic'])}
+            sequence.append((name, 'POST', f'{base_url}/api/ibw-stats', body))
+    return sequence
+
+def run_load(sequence, concurrency, duration):
+    """Replay the request sequence with `concurrency` clients for `duration` seconds."""
+    requests_iter = itertools.cycle(sequence)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    results = []
+
+    def client():
+        session = requests.Session()
+        session.headers['Accept-Encoding'] = 'gzip'
+        local = []
+        while time.perf_counter() < deadline:
+            with lock:
+                name, method, url, body = next(requests_iter)
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, json=body, timeout=600)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append((name, time.perf_counter() - start, ok))
+        return local
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for local in executor.map(lambda _: client(), range(concurrency)):
+            results.extend(local)
+    return results, time.perf_counter() - start
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+def summarize(results, elapsed):
+    """Throughput, latency percentiles (ms) and error count, overall and per endpoint."""
+    def stats_for(rows):
+        latencies = [latency * 1000 for _, latency, _ in rows]
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for _, _, ok in rows if not ok),
+            'rps': len(rows) / elapsed if elapsed else 0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': max(latencies)
+        }
+
+    if not results:
+        return {'requests': 0, 'errors': 0, 'rps': 0, 'endpoints': {}}
+    summary = stats_for(results)
+    summary['endpoints'] = {name: stats_for([r for r in results if r[0] == name])
+                            for name in sorted({r[0] for r in results})}
+    return summary
+
+def parse_mix(text):
+    """Parse 'stats=0.5,ibw-stats=0.3,...' into a weight dict."""
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'")
+        mix[name] = float(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', help='Directory with the .gpkg files (default: generate a synthetic dataset)')
+    parser.add_argument('--days', type=int, default=60, help='Days of synthetic data to generate')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, (2 * os.cpu_count()) + 1])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--worker-class', nargs='+', default=['sync', 'gthread'],
+                        help='gunicorn worker classes; sync ignores --threads')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before each level')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Endpoint weights, e.g. stats=0.5,ibw-stats=0.3,available-dates=0.1,high-impact-events=0.1')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--startup-timeout', type=float, default=600)
+    parser.add_argument('--output', help='Write the full results as JSON to this file')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='fho-load-')
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = os.path.join(work_dir, 'data')
+        print(f"Generating {args.days} days of synthetic data in {data_dir}...")
+        synthetic_data.generate(data_dir, days=args.days, seed=args.seed)
+
+    configs = []
+    for worker_class in args.worker_class:
+        # Threads only matter to the gthread worker
+        thread_counts = args.threads if worker_class == 'gthread' else [1]
+        configs.extend((workers, threads, worker_class) for workers in args.workers for threads in thread_counts)
+
+    results = []
+    header = (f"{'class':<9}{'workers':>8}{'threads':>8}{'clients':>8}{'reqs':>7}{'errors':>7}"
+              f"{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak MB':>9}")
+    print(header)
+    for workers, threads, worker_class in configs:
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        log_path = os.path.join(work_dir, f'gunicorn-{worker_class}-{workers}w-{threads}t.log')
+        server = start_server(data_dir, port, workers, threads, worker_class, log_path)
+        try:
+            dates = wait_until_ready(base_url, server, args.startup_timeout)
+            sequence = build_requests(base_url, dates, args.mix, 2000, args.seed)
+            for concurrency in args.concurrency:
+                run_load(sequence, concurrency, args.warmup)
+                sampler = MemorySampler(server.pid)
+                sampler.start()
+                load_results, elapsed = run_load(sequence, concurrency, args.duration)
+                peak_mb, mean_mb = sampler.stop()
+
+                summary = summarize(load_results, elapsed)
+                summary.update({
+                    'worker_class': worker_class, 'workers': workers, 'threads': threads,
+                    'concurrency': concurrency, 'peak_memory_mb': peak_mb, 'mean_memory_mb': mean_mb
+                })
+                results.append(summary)
+                print(f"{worker_class:<9}{workers:>8}{threads:>8}{concurrency:>8}{summary['requests']:>7}"
+                      f"{summary['errors']:>7}{summary['rps']:>8.1f}{summary.get('p50_ms', 0):>9.0f}"
+                      f"{summary.get('p95_ms', 0):>9.0f}{summary.get('p99_ms', 0):>9.0f}{peak_mb:>9.0f}")
+        except RuntimeError as e:
+            print(f"{worker_class:<9}{workers:>8}{threads:>8}  failed: {e} (see {log_path})")
+        finally:
+            stop_server(server)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote results to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Generate a deterministic local stand-in for the FHO, LSR and flood warning data files.
+
+Writes fho_all.gpkg, LSRs_flood_allYears.gpkg and flood_warnings_all.gpkg with
+the layer names and columns app.py reads, so the app can be run, load tested
+or regression checked without downloading the real archive. The same seed
+always produces the same files.
+
+    python benchmarks/synthetic_data.py /tmp/fho-data --days 60
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import geopandas as gpd
+import numpy as np
+from shapely.affinity import scale
+from shapely.geometry import Point, box
+
+# (state, WFO) pairs used for LSR and FFW attributes
+OFFICES = [
+    ('TX', 'FWD'), ('TX', 'EWX'), ('OK', 'OUN'), ('KS', 'ICT'), ('MO', 'SGF'),
+    ('AR', 'LZK'), ('LA', 'LIX'), ('MS', 'JAN'), ('TN', 'OHX'), ('KY', 'JKL'),
+    ('VA', 'RNK'), ('PA', 'CTP'), ('NY', 'BGM'), ('AZ', 'PSR'), ('NM', 'ABQ')
+]
+FORECAST_PERIODS = ['1-3', '4-7', '1-7']
+ISSUANCE_HOURS = {'am': 12, 'pm': 21}
+DAMAGE_TAGS = [None, 'CONSIDERABLE', 'CATASTROPHIC']
+CONUS = (-110.0, 28.0, -72.0, 45.0)
+
+def random_area(rng, size):
+    """Random irregular polygon roughly `size` degrees across."""
+    x = rng.uniform(CONUS[0], CONUS[2] - size)
+    y = rng.uniform(CONUS[1], CONUS[3] - size)
+    area = Point(x, y).buffer(size / 2, quad_segs=8)
+    return scale(area, xfact=rng.uniform(0.6, 1.6), yfact=rng.uniform(0.6, 1.4))
+
+def random_warning(rng):
+    """Random warning polygon of a few counties."""
+    x = rng.uniform(CONUS[0], CONUS[2])
+    y = rng.uniform(CONUS[1], CONUS[3])
+    return box(x, y, x + rng.uniform(0.1, 0.8), y + rng.uniform(0.1, 0.6))
+
+def generate_fho(rng, start, days):
+    """FHO areas for every day x issuance x forecast period, split into am/pm layers."""
+    layers = {'am': [], 'pm': []}
+    for day in range(days):
+        issued_date = start + timedelta(days=day)
+        for issuance, hour in ISSUANCE_HOURS.items():
+            for period in FORECAST_PERIODS:
+                areas = [('Limited_merged', size) for size in rng.uniform(3, 8, rng.integers(2, 6))]
+                if rng.random() < 0.35:
+                    areas.append(('Considerable', rng.uniform(1.5, 3)))
+                if rng.random() < 0.08:
+                    areas.append(('Catastrophic', rng.uniform(0.5, 1.5)))
+                for impact_level, size in areas:
+                    layers[issuance].append({
+                        'valid_start': issued_date.replace(hour=hour),
+                        'issuance_time': issuance,
+                        'impact_level': impact_level,
+                        'forecast_period': period,
+                        'geometry': random_area(rng, size)
+                    })
+    return layers
+
+def generate_lsrs(rng, start, days, per_day):
+    """Flood LSR points, spanning the FHO days plus the longest verification window."""
+    rows = []
+    for day in range(days + 8):
+        day_start = start + timedelta(days=day)
+        for _ in range(rng.poisson(per_day)):
+            state, wfo = OFFICES[rng.integers(len(OFFICES))]
+            rows.append({
+                'VALID': day_start + timedelta(minutes=int(rng.integers(0, 1440))),
+                'EVENT': 'FLASH FLOOD' if rng.random() < 0.7 else 'FLOOD',
+                'MAG': float(rng.uniform(0, 6)) if rng.random() < 0.4 else np.nan,
+                'CITY': f"{wfo} {int(rng.integers(1, 400))}",
+                'STATE': state,
+                'WFO': wfo,
+                'SOURCE': rng.choice(['TRAINED SPOTTER', 'EMERGENCY MNGR', 'PUBLIC', 'LAW ENFORCEMENT']),
+                'REMARKS': None if rng.random() < 0.3 else 'Water over the road.',
+                'geometry': Point(rng.uniform(CONUS[0], CONUS[2]), rng.uniform(CONUS[1], CONUS[3]))
+            })
+    return rows
+
+def generate_ffws(rng, start, days, per_day):
+    """Flood warnings (mostly FF, some FA) with damage tags, by issuance year."""
+    rows = {}
+    for day in range(days + 8):
+        day_start = start + timedelta(days=day)
+        for _ in range(rng.poisson(per_day)):
+            issued = day_start + timedelta(minutes=int(rng.integers(0, 1440)))
+            _, wfo = OFFICES[rng.integers(len(OFFICES))]
+            rows.setdefault(issued.year, []).append({
+                'WFO': wfo,
+                'ISSUED': issued,
+                'EXPIRED': issued + timedelta(minutes=int(rng.integers(45, 12 * 60))),
+                'PHENOM': 'FF' if rng.random() < 0.85 else 'FA',
+                'SIG': 'W',
+                'DAMAGTAG': DAMAGE_TAGS[rng.choice(3, p=[0.75, 0.2, 0.05])],
+                'geometry': random_warning(rng)
+            })
+    return rows
+
+def generate(out_dir, start_date='2024-06-01', days=30, lsrs_per_day=60, ffws_per_day=40, seed=0):
+    """Write the three data files to out_dir and return their paths."""
+    rng = np.random.default_rng(seed)
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    os.makedirs(out_dir, exist_ok=True)
+
+    fho_path = os.path.join(out_dir, 'fho_all.gpkg')
+    lsr_path = os.path.join(out_dir, 'LSRs_flood_allYears.gpkg')
+    ffw_path = os.path.join(out_dir, 'flood_warnings_all.gpkg')
+    for path in (fho_path, lsr_path, ffw_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    for issuance, rows in generate_fho(rng, start, days).items():
+        by_year = {}
+        for row in rows:
+            by_year.setdefault(row['valid_start'].year, []).append(row)
+        for year, year_rows in by_year.items():
+            gpd.GeoDataFrame(year_rows, crs='EPSG:4326').to_file(
+                fho_path, layer=f'fho_{year}_{issuance}', driver='GPKG')
+
+    gpd.GeoDataFrame(generate_lsrs(rng, start, days, lsrs_per_day), crs='EPSG:4326').to_file(lsr_path, driver='GPKG')
+
+    for year, rows in generate_ffws(rng, start, days, ffws_per_day).items():
+        gpd.GeoDataFrame(rows, crs='EPSG:4326').to_file(ffw_path, layer=f'wwa_{year}', driver='GPKG')
+
+    return fho_path, lsr_path, ffw_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_dir', help='Directory to write the .gpkg files to')
+    parser.add_argument('--start-date', default='2024-06-01')
+    parser.add_argument('--days', type=int, default=30, help='Number of FHO issuance days')
+    parser.add_argument('--lsrs-per-day', type=int, default=60)
+    parser.add_argument('--ffws-per-day', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate(args.out_dir, args.start_date, args.days, args.lsrs_per_day, args.ffws_per_day, args.seed)
+    for path in paths:
+        print(f"Wrote {path}")
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,15 @@
 import multiprocessing
+import os
 
 # Bind to all interfaces on port 5000
 bind = "0.0.0.0:5000"
 
+# Worker settings can be overridden from the environment (e.g. in
+# docker-compose.yml); use benchmarks/load_test.py to compare settings.
 # Number of workers = (2 x CPU cores) + 1
-workers = (2 * multiprocessing.cpu_count()) + 1
-worker_class = 'gthread'
-threads = 4
+workers = int(os.environ.get('GUNICORN_WORKERS', (2 * multiprocessing.cpu_count()) + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
 timeout = 600  # Increase timeout for data loading
 keepalive = 5
 max_requests = 1000
@@ -19,5 +22,6 @@ errorlog = '-'
 loglevel = 'info'
 
 # Performance
-worker_connections = 2000
-backlog = 2048 
\ No newline at end of file
+# Only used by the async worker classes (gevent/eventlet); gthread ignores it
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 2000))
+backlog = 2048
@@ -55,6 +55,19 @@ const config = {
         weight: 1,
         opacity: 1,
         fillOpacity: 0.8
+    },
+    // Performance mode draws vector layers on a shared canvas and clusters LSR
+    // points. 'auto' switches it on once a response has more features than
+    // featureThreshold; 'on' and 'off' force it either way.
+    performance: {
+        mode: 'auto',
+        featureThreshold: 500,
+        cluster: {
+            chunkedLoading: true,
+            showCoverageOnHover: false,
+            maxClusterRadius: 40,
+            disableClusteringAtZoom: 10
+        }
     }
 };
 
@@ -101,6 +114,12 @@ const layers = {
 
 Object.values(layers).forEach(layer => layer.addTo(map));
 
+// Shared canvas renderer used in performance mode
+const canvasRenderer = L.canvas({ padding: 0.5 });
+
+// Key of the map data currently drawn, so statistics-only updates reuse the layers
+let renderedMapKey = null;
+
 // Enhanced cache management
 const statsCache = new Map();
 const MAX_CACHE_SIZE = 50; // Maximum number of cached results
@@ -119,6 +138,21 @@ function generateCacheKey(filters) {
     return `${filters.issuance_date}_${filters.end_date}_${filters.issuance}_${filters.forecast_period}_${filters.pod_threshold}`;
 }
 
+// Helper function to generate the map key; end date and POD threshold only change the statistics
+function generateMapKey(filters) {
+    return `${filters.issuance_date}_${filters.issuance}_${filters.forecast_period}`;
+}
+
+// Helper function to decide whether to draw in performance mode
+function usePerformanceMode(geometries) {
+    const { mode, featureThreshold } = config.performance;
+    if (mode !== 'auto') return mode === 'on';
+
+    const featureCount = ['lsrs_hit', 'lsrs_miss', 'ffws_hit', 'ffws_miss']
+        .reduce((count, key) => count + (geometries[key]?.features?.length || 0), 0);
+    return featureCount > featureThreshold;
+}
+
 // Helper function to update loading states
 function setLoadingState(isLoading, elementId = null) {
     if (elementId) {
@@ -131,14 +165,15 @@ function setLoadingState(isLoading, elementId = null) {
     }
 }
 
-// Helper function to create LSR markers
-function createLSRMarker(feature, latlng, isHit) {
+// Helper function to create LSR markers; popup content is built when the popup opens
+function createLSRMarker(feature, latlng, isHit, performanceMode = false) {
     if (isHit) {
         return L.circleMarker(latlng, {
             ...config.pointMarkers,
             fillColor: config.styles.lsrsHit.color,
-            color: "#000"
-        }).bindPopup(createPopupContent('LSR', feature, isHit));
+            color: "#000",
+            ...(performanceMode && { renderer: canvasRenderer })
+        }).bindPopup(() => createPopupContent('LSR', feature, isHit));
     } else {
         // For misses, use a custom divIcon to create an X
         return L.marker(latlng, {
@@ -147,26 +182,43 @@ function createLSRMarker(feature, latlng, isHit) {
                 className: 'lsr-miss-marker',
                 iconSize: [12, 12]
             })
-        }).bindPopup(createPopupContent('LSR', feature, isHit));
+        }).bindPopup(() => createPopupContent('LSR', feature, isHit));
     }
 }
 
+// Helper function to group LSR markers into clusters colored like the markers
+function createLSRCluster(markers, isHit) {
+    const color = isHit ? config.styles.lsrsHit.color : config.styles.lsrsMiss.color;
+    const cluster = L.markerClusterGroup({
+        ...config.performance.cluster,
+        iconCreateFunction: (group) => L.divIcon({
+            html: `<div style="background-color: ${color};">${group.getChildCount()}</div>`,
+            className: 'lsr-cluster',
+            iconSize: [30, 30]
+        })
+    });
+    cluster.addLayers(markers.getLayers());
+    return cluster;
+}
+
 // Helper function to create FFW layers
-function createFFWLayer(features, isHit) {
+function createFFWLayer(features, isHit, performanceMode = false) {
     return L.geoJSON(features, {
         style: (feature) => getFFWStyle(feature, isHit),
+        ...(performanceMode && { renderer: canvasRenderer }),
         onEachFeature: (feature, layer) => {
-            layer.bindPopup(createPopupContent('FFW', feature, isHit));
+            layer.bindPopup(() => createPopupContent('FFW', feature, isHit));
         }
     });
 }
 
 // Helper function to create FHO layer
-function createFHOLayer(feature) {
+function createFHOLayer(feature, performanceMode = false) {
     return L.geoJSON(feature, { 
         style: config.styles.fho,
+        ...(performanceMode && { renderer: canvasRenderer }),
         onEachFeature: (feature, layer) => {
-            layer.bindPopup(createPopupContent('FHO', feature));
+            layer.bindPopup(() => createPopupContent('FHO', feature));
         }
     });
 }
@@ -233,10 +285,10 @@ function createPopupContent(type, feature, isHit = null) {
                 Impact Level: Limited
             `;
         case 'LSR':
-            return feature.properties.popup_content || 
+            return renderPopupContent(feature.properties) || 
                 `LSR ${isHit ? 'Hit' : 'Miss'}: ${feature.properties.EVENT || 'Unknown'}<br>Time: ${feature.properties.VALID || 'Unknown'}`;
         case 'FFW':
-            return feature.properties.popup_content || 
+            return renderPopupContent(feature.properties) || 
                 `<b>Flash Flood Warning Details:</b><br>
                 Status: ${isHit ? 'Hit' : 'Miss'}<br>
                 Issued: ${feature.properties.ISSUED || 'Unknown'}<br>
@@ -267,21 +319,25 @@ function addLayerToMap(layer, layerGroup, currentBounds) {
 }
 
 // Enhanced layer creation helper
-function createAndAddLayer(features, layerType, isHit = null, layerGroup, currentBounds) {
+function createAndAddLayer(features, layerType, isHit = null, layerGroup, currentBounds, performanceMode = false) {
     if (!features?.features?.length && !features?.geometry) return currentBounds;
 
     let layer;
     switch (layerType) {
         case 'LSR':
             layer = L.geoJSON(features, {
-                pointToLayer: (feature, latlng) => createLSRMarker(feature, latlng, isHit)
+                pointToLayer: (feature, latlng) => createLSRMarker(feature, latlng, isHit, performanceMode)
             });
+            // Clustering needs the Leaflet.markercluster plugin; draw every marker without it
+            if (performanceMode && typeof L.markerClusterGroup === 'function') {
+                layer = createLSRCluster(layer, isHit);
+            }
             break;
         case 'FFW':
-            layer = createFFWLayer(features, isHit);
+            layer = createFFWLayer(features, isHit, performanceMode);
             break;
         case 'FHO':
-            layer = createFHOLayer(features);
+            layer = createFHOLayer(features, performanceMode);
             break;
         default:
             return currentBounds;
@@ -345,15 +401,46 @@ const LoadingManager = {
     isLoading: () => LoadingManager.elements.size > 0
 };
 
+// Draw the map layers for a response, reusing the current layers if the map data is unchanged
+function renderMapLayers(data, mapKey) {
+    if (mapKey === renderedMapKey) return;
+
+    const performanceMode = usePerformanceMode(data.geometries);
+
+    // Clear existing layers
+    Object.values(layers).forEach(layer => layer.clearLayers());
+
+    // Create a bounds object to track the extent of all features
+    let mapBounds = null;
+
+    // Add FHO layer first (bottom)
+    mapBounds = createAndAddLayer(data.geometries.fho, 'FHO', null, layers.fho, mapBounds, performanceMode);
+    
+    // Add FFWs second (middle)
+    mapBounds = createAndAddLayer(data.geometries.ffws_hit, 'FFW', true, layers.ffwsHit, mapBounds, performanceMode);
+    mapBounds = createAndAddLayer(data.geometries.ffws_miss, 'FFW', false, layers.ffwsMiss, mapBounds, performanceMode);
+    
+    // Add LSRs last (top)
+    mapBounds = createAndAddLayer(data.geometries.lsrs_hit, 'LSR', true, layers.lsrsHit, mapBounds, performanceMode);
+    mapBounds = createAndAddLayer(data.geometries.lsrs_miss, 'LSR', false, layers.lsrsMiss, mapBounds, performanceMode);
+
+    renderedMapKey = mapKey;
+
+    // Fit map to bounds
+    map.fitBounds(mapBounds?.isValid() ? mapBounds : config.bounds.CONUS);
+}
+
 // Enhanced handleMapUpdate function
 async function handleMapUpdate(filters) {
     const cacheKey = generateCacheKey(filters);
+    const mapKey = generateMapKey(filters);
     
     // Check cache first
     if (statsCache.has(cacheKey)) {
         const cachedData = statsCache.get(cacheKey);
         updateStatistics(cachedData.statistics);
         updatePodThresholdStats(cachedData);
+        renderMapLayers(cachedData, mapKey);
         return;
     }
 
@@ -362,7 +449,8 @@ async function handleMapUpdate(filters) {
         const response = await fetch('/api/stats', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Accept': COMPACT_ACCEPT
             },
             body: JSON.stringify(filters)
         });
@@ -371,7 +459,7 @@ async function handleMapUpdate(filters) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
-        const data = await response.json();
+        const data = decodeMapPayload(await response.json());
         
         // Cache the results
         statsCache.set(cacheKey, data);
@@ -381,27 +469,11 @@ async function handleMapUpdate(filters) {
         updateStatistics(data.statistics);
         updatePodThresholdStats(data);
 
-        // Clear existing layers
-        Object.values(layers).forEach(layer => layer.clearLayers());
-
-        // Create a bounds object to track the extent of all features
-        let mapBounds = null;
-
-        // Add FHO layer first (bottom)
-        mapBounds = createAndAddLayer(data.geometries.fho, 'FHO', null, layers.fho, mapBounds);
-        
-        // Add FFWs second (middle)
-        mapBounds = createAndAddLayer(data.geometries.ffws_hit, 'FFW', true, layers.ffwsHit, mapBounds);
-        mapBounds = createAndAddLayer(data.geometries.ffws_miss, 'FFW', false, layers.ffwsMiss, mapBounds);
-        
-        // Add LSRs last (top)
-        mapBounds = createAndAddLayer(data.geometries.lsrs_hit, 'LSR', true, layers.lsrsHit, mapBounds);
-        mapBounds = createAndAddLayer(data.geometries.lsrs_miss, 'LSR', false, layers.lsrsMiss, mapBounds);
-
-        // Fit map to bounds
-        map.fitBounds(mapBounds?.isValid() ? mapBounds : config.bounds.CONUS);
+        // Redraw the map only when the selected date, issuance or period changed
+        renderMapLayers(data, mapKey);
     } catch (error) {
         ErrorHandler.handleError(error, () => {
+            renderedMapKey = null;
             map.fitBounds(config.bounds.CONUS);
             ErrorHandler.showError('Failed to update map. Please try again.');
         });
@@ -660,6 +732,18 @@ style.textContent = `
         0% { transform: rotate(0deg); }
         100% { transform: rotate(360deg); }
     }
+    .lsr-cluster div {
+        width: 30px;
+        height: 30px;
+        border: 2px solid #000;
+        border-radius: 50%;
+        color: #fff;
+        font-size: 12px;
+        font-weight: 600;
+        line-height: 26px;
+        text-align: center;
+        opacity: 0.85;
+    }
 `;
 document.head.appendChild(style);
 
@@ -0,0 +1,122 @@
+// Decoder for the compact map payload format (application/vnd.fho.compact+json).
+// The server quantizes coordinates, delta-encodes position lists and sends
+// feature properties column-wise; popup text is rendered here on demand.
+const COMPACT_MIMETYPE = 'application/vnd.fho.compact+json';
+
+// Accept header preferring the compact format, with plain JSON as fallback
+const COMPACT_ACCEPT = `${COMPACT_MIMETYPE}, application/json;q=0.9`;
+
+// Helper function to decode a flat [dx, dy, ...] delta list into positions
+function decodePositions(deltas, scale) {
+    const positions = new Array(deltas.length / 2);
+    let x = 0;
+    let y = 0;
+    for (let i = 0; i < deltas.length; i += 2) {
+        x += deltas[i];
+        y += deltas[i + 1];
+        positions[i / 2] = [x / scale, y / scale];
+    }
+    return positions;
+}
+
+// Helper function to decode a quantized geometry back to GeoJSON
+function decodeGeometry(geometry, scale) {
+    if (!geometry) return geometry;
+
+    const coords = geometry.coordinates;
+    switch (geometry.type) {
+        case 'Point':
+            return { type: 'Point', coordinates: [coords[0] / scale, coords[1] / scale] };
+        case 'MultiPoint':
+        case 'LineString':
+            return { type: geometry.type, coordinates: decodePositions(coords, scale) };
+        case 'Polygon':
+        case 'MultiLineString':
+            return { type: geometry.type, coordinates: coords.map(ring => decodePositions(ring, scale)) };
+        case 'MultiPolygon':
+            return {
+                type: 'MultiPolygon',
+                coordinates: coords.map(polygon => polygon.map(ring => decodePositions(ring, scale)))
+            };
+        case 'GeometryCollection':
+            return {
+                type: 'GeometryCollection',
+                geometries: geometry.geometries.map(geom => decodeGeometry(geom, scale))
+            };
+        default:
+            return geometry;
+    }
+}
+
+// Helper function to expand a column-wise collection into a GeoJSON FeatureCollection
+function decodeCompactCollection(collection, scale) {
+    const columns = Object.entries(collection.columns || {});
+    const features = collection.geometries.map((geometry, i) => {
+        const properties = {};
+        columns.forEach(([name, values]) => {
+            properties[name] = values[i];
+        });
+        return {
+            type: 'Feature',
+            geometry: decodeGeometry(geometry, scale),
+            properties
+        };
+    });
+    return { type: 'FeatureCollection', features };
+}
+
+// Decode the geometries of a map payload in place; plain JSON payloads pass through
+function decodeMapPayload(data) {
+    if (data?.encoding?.format !== 'compact' || !data.geometries) return data;
+
+    const scale = data.encoding.scale;
+    Object.entries(data.geometries).forEach(([key, value]) => {
+        if (value?.type === 'CompactFeatureCollection') {
+            data.geometries[key] = decodeCompactCollection(value, scale);
+        } else if (value?.type === 'Feature') {
+            value.geometry = decodeGeometry(value.geometry, scale);
+        }
+    });
+    return data;
+}
+
+// Helper function to format a property the way the server-side popup did
+function formatPopupValue(properties, name, fallback) {
+    if (!(name in properties)) return fallback;
+    const value = properties[name];
+    return value === null ? 'None' : value;
+}
+
+// Helper function to format an HTTP-date property as YYYY-MM-DD HH:MM:SS (UTC), like the server-side popup
+function formatPopupTime(properties, name, fallback) {
+    const value = formatPopupValue(properties, name, fallback);
+    const time = new Date(value);
+    return isNaN(time) ? value : time.toISOString().replace('T', ' ').slice(0, 19);
+}
+
+// Render the LSR/FFW popup text from feature properties (mirrors row_to_feature in app.py)
+function renderPopupContent(properties) {
+    if (!properties) return '';
+    if (properties.popup_content) return properties.popup_content;
+
+    if (properties.EVENT !== undefined && properties.EVENT !== null) {
+        return `
+            <b>LSR Details:</b><br>
+            Event: ${properties.EVENT}<br>
+            Location: ${formatPopupValue(properties, 'CITY', 'Unknown')}, ${formatPopupValue(properties, 'STATE', 'Unknown')}<br>
+            Time: ${formatPopupTime(properties, 'VALID', 'Unknown')}<br>
+            Source: ${formatPopupValue(properties, 'SOURCE', 'Unknown')}<br>
+            Remarks: ${formatPopupValue(properties, 'REMARKS', 'None')}
+        `;
+    }
+    if (properties.PHENOM === 'FF') {
+        return `
+            <b>Flood Warning Details:</b><br>
+            Issued: ${formatPopupTime(properties, 'ISSUED', 'Unknown')}<br>
+            Expired: ${formatPopupTime(properties, 'EXPIRED', 'Unknown')}<br>
+            Phenomena: ${formatPopupValue(properties, 'PHENOM', 'Unknown')}<br>
+            Impact: ${formatPopupValue(properties, 'DAMAGTAG', 'Unknown')}
+        `;
+    }
+    return '';
+}